@@ -0,0 +1,21 @@
+"""Build the per-index Parquet dataset used by `load_data(stock_index=...)`.
+
+Run once from the repository root, and again whenever the CSV changes:
+
+    python scripts/partition.py [path/to/indexData.csv]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+from src.data_loader import build_partitioned_dataset
+
+
+def main(file_path: str = 'data/indexData.csv'):
+    root = build_partitioned_dataset(file_path)
+    print(f"Wrote partitioned dataset to {root}")
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -3,67 +3,133 @@ This module provides functions to load and preprocess stock index data from CSV
 It includes a DataCleaner class for modular data cleaning operations.
 """
 
+import hashlib
 from pathlib import Path
 from typing import Optional
+import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pv
+except ImportError:  # pragma: no cover - pyarrow is optional
+    pa = None
+
+# Column dtypes applied at read time: categorical index codes make per-index
+# filtering an integer comparison and float32 prices halve the frame size.
+RAW_DTYPES = {
+    'Index': 'category',
+    'Open': np.float32,
+    'High': np.float32,
+    'Low': np.float32,
+    'Close': np.float32,
+    'Volume': np.float64,
+}
+
+
+# Column mappings
+COLUMN_MAPPING = {
+    'Index': 'stock_index',
+    'Date': 'date',
+    'Open': 'open',
+    'High': 'high',
+    'Low': 'low',
+    'Close': 'close',
+    'Volume': 'volume'
+}
+
+# Stock index mappings
+STOCK_INDEX_MAPPING = {
+    'NYA': 'New York',
+    'IXIC': 'NASDAQ',
+    'HSI': 'Hong Kong',
+    '000001.SS': 'Shanghai',
+    'N225': 'Tokyo',
+    'N100': 'Euronext',
+    '399001.SZ': 'Shenzhen',
+    'GSPTSE': 'Toronto',
+    'NSEI': 'India',
+    'GDAXI': 'Frankfurt',
+    'KS11': 'Korea',
+    'SSMI': 'Switzerland',
+    'TWII': 'Taiwan',
+    'J203.JO': 'Johannesburg'
+}
+
+# Raw ticker code for each display name, so loaders accept either form
+_INDEX_CODES = {name: code for code, name in STOCK_INDEX_MAPPING.items()}
+
+# Columns that must be present for a row to be kept
+CORE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
 
 class DataCleaner:
     """Lightweight data cleaning helper exposing small, specific methods."""
     
     # Renaming columns and stock index values
     def rename_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        # Column mappings
-        column_mapping = {
-            'Index': 'stock_index',
-            'Date': 'date',
-            'Open': 'open',
-            'High': 'high',
-            'Low': 'low',
-            'Close': 'close',
-            'Volume': 'volume'
-        }
-        
-        # Stock index mappings
-        stock_index_mapping = {
-            'NYA': 'New York',
-            'IXIC': 'NASDAQ',
-            'HSI': 'Hong Kong',
-            '000001.SS': 'Shanghai',
-            'N225': 'Tokyo',
-            'N100': 'Euronext',
-            '399001.SZ': 'Shenzhen',
-            'GSPTSE': 'Toronto',
-            'NSEI': 'India',
-            'GDAXI': 'Frankfurt',
-            'KS11': 'Korea',
-            'SSMI': 'Switzerland',
-            'TWII': 'Taiwan',
-            'J203.JO': 'Johannesburg'
-        }
-        
-        # Rename columns and stock index values in one go
-        df = df.rename(columns=column_mapping).replace({'stock_index': stock_index_mapping})
+        df = df.rename(columns=COLUMN_MAPPING)
+        # Categorical columns are renamed through their categories (one entry per index)
+        if isinstance(df['stock_index'].dtype, pd.CategoricalDtype):
+            df['stock_index'] = df['stock_index'].cat.rename_categories(
+                lambda code: STOCK_INDEX_MAPPING.get(code, code)
+            )
+        else:
+            df = df.replace({'stock_index': STOCK_INDEX_MAPPING})
 
         return df
 
     def parse_dates(self, df: pd.DataFrame) -> pd.DataFrame:
+        # Dates are normally parsed by read_csv already; only convert raw strings
+        if pd.api.types.is_datetime64_any_dtype(df['date']):
+            return df
         df = df.copy()
         df['date'] = pd.to_datetime(df['date'])
         return df
 
     def filter_by_dates(self, df: pd.DataFrame, start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
-        if start_date:
-            df = df[df['date'] >= pd.to_datetime(start_date)]
-        if end_date:
-            df = df[df['date'] <= pd.to_datetime(end_date)]
-        return df
+        """Keep rows with start_date <= date <= end_date (either bound optional).
+
+        Uses the 'date' column, or the DatetimeIndex once dates are the index.
+        Sorted dates are sliced via binary search instead of a boolean mask.
+        """
+        if not start_date and not end_date:
+            return df
+        dates = pd.DatetimeIndex(df['date'] if 'date' in df.columns else df.index)
+        start = pd.to_datetime(start_date) if start_date else None
+        end = pd.to_datetime(end_date) if end_date else None
+
+        if dates.is_monotonic_increasing:
+            lo = dates.searchsorted(start, side='left') if start is not None else 0
+            hi = dates.searchsorted(end, side='right') if end is not None else len(dates)
+            return df.iloc[lo:hi]
+
+        mask = np.ones(len(dates), dtype=bool)
+        if start is not None:
+            mask &= dates >= start
+        if end is not None:
+            mask &= dates <= end
+        return df[mask]
 
     def basic_data_preprocessing(self, df: pd.DataFrame, start_date: Optional[str], end_date: Optional[str]) -> pd.DataFrame:
         df = self.rename_columns(df)
         df = self.parse_dates(df)
         df = self.filter_by_dates(df, start_date, end_date)
+        df = self.downcast(df)
         return df
+
+    def downcast(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Shrink dtypes: category stock_index, float32 prices, int64 volume."""
+        price_columns = ['open', 'high', 'low', 'close']
+        columns = {col: df[col].astype(np.float32) for col in price_columns}
+        columns['stock_index'] = df['stock_index'].astype('category')
+        # Volume can only become integer once NaNs are gone; always int64 so
+        # every subset shares one dtype and differences stay signed
+        volume = df['volume']
+        if not volume.hasnans and (volume % 1 == 0).all():
+            columns['volume'] = volume.astype(np.int64)
+        return df.assign(**columns)
     
     def set_and_sort(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df.set_index('date')
@@ -71,14 +137,47 @@ class DataCleaner:
         return df
     
     def drop_rows_with_missing_data(self, df: pd.DataFrame) -> pd.DataFrame:
-        core_columns = ['open', 'high', 'low', 'close', 'volume']
-        df = df.dropna(subset=core_columns)
+        df = df.dropna(subset=CORE_COLUMNS)
         return df
     
     def drop_rows_with_zero_volume(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df[df['volume'] > 0]
         return df
 
+def _read_index_csv(path: Path, stock_index: Optional[str] = None) -> pd.DataFrame:
+    """Read the raw CSV, keeping only rows for `stock_index` when given.
+
+    `stock_index` may be a raw code ('N100') or its mapped name ('Euronext').
+    With pyarrow installed the file is parsed by Arrow and the index filter is
+    applied to the Arrow table, so rows for other indices never reach pandas.
+    """
+    if stock_index:
+        stock_index = _INDEX_CODES.get(stock_index, stock_index)
+    if pa is None:
+        df = pd.read_csv(path, dtype=RAW_DTYPES, parse_dates=['Date'])
+        if stock_index:
+            df = df[df['Index'] == stock_index]
+        return df
+
+    column_types = {'Date': pa.timestamp('ns'), 'Volume': pa.float64()}
+    column_types.update({col: pa.float32() for col in ('Open', 'High', 'Low', 'Close')})
+    table = pv.read_csv(path, convert_options=pv.ConvertOptions(column_types=column_types))
+    if stock_index:
+        table = table.filter(pc.equal(table['Index'], stock_index))
+    # Dictionary-encode the index column so it converts to a pandas category
+    index_pos = table.schema.get_field_index('Index')
+    table = table.set_column(index_pos, 'Index', pc.dictionary_encode(table['Index']))
+    return table.to_pandas(split_blocks=True, self_destruct=True)
+
+def _only_index(df: pd.DataFrame, stock_index: str) -> pd.DataFrame:
+    """Set the stock_index categories to just the requested index.
+
+    Every load path then returns the same dtype for a single-index load,
+    including when no rows match.
+    """
+    name = STOCK_INDEX_MAPPING.get(stock_index, stock_index)
+    return df.assign(stock_index=df['stock_index'].cat.set_categories([name]))
+
 def load_raw_data(stock_index=None, start_date=None, end_date=None, file_path='../data/indexData.csv'):
     """Load raw data from a given file path."""
     
@@ -89,33 +188,20 @@ def load_raw_data(stock_index=None, start_date=None, end_date=None, file_path='.
     # Error handling for file not found
     if not path.exists():
         raise FileNotFoundError(f"The file not found: {path}")
-    # Read file to DataFrame
-    df_raw = pd.read_csv(path)
-
-    # filter for a specific stock index if provided
-    if stock_index:
-        df_raw = df_raw[df_raw['Index'] == stock_index]
+    # Read file to DataFrame, filtering for a specific stock index if provided
+    df_raw = _read_index_csv(path, stock_index)
 
     # Delegate cleaning to DataCleaner
     cleaner = DataCleaner()
     df = cleaner.basic_data_preprocessing(df_raw, start_date, end_date)
+    if stock_index:
+        df = _only_index(df, stock_index)
     return df
 
-def load_data(stock_index=None, start_date=None, end_date=None, file_path='../data/indexData.csv'):
-    """Load data from a given file path."""
-    print(f"Loading data from {file_path}...")
-    
-    # read CSV
-    path = Path(file_path)
-    # Error handling for file not found
-    if not path.exists():
-        raise FileNotFoundError(f"The file not found: {path}")
-    # Read file to DataFrame
-    df = pd.read_csv(path)
-    
-    # Filter for specific stock index if provided
-    if stock_index:
-        df = df[df['Index'] == stock_index]
+def _clean_data(path: Path, stock_index=None, start_date=None, end_date=None) -> pd.DataFrame:
+    """Read and fully clean the CSV (the uncached load_data pipeline)."""
+    # Read file to DataFrame, filtering for a specific stock index if provided
+    df = _read_index_csv(path, stock_index)
     
     # Delegate cleaning to DataCleaner
     cleaner = DataCleaner()
@@ -130,4 +216,109 @@ def load_data(stock_index=None, start_date=None, end_date=None, file_path='../da
     # Drop rows with zero volume
     df = cleaner.drop_rows_with_zero_volume(df)
     
+    # Narrow volume now that rows with missing data are gone
+    df = cleaner.downcast(df)
+    
+    if stock_index:
+        df = _only_index(df, stock_index)
+    return df
+
+# Version of the cleaning pipeline (DataCleaner, _read_index_csv, _only_index,
+# _clean_data). Bump it whenever their output changes so cached Parquet files
+# written by older code are not reused.
+_CACHE_VERSION = 2
+
+# Short hash of the cleaning version and spec; baked into the Parquet cache
+# name so changing either never reuses a stale cache.
+_CACHE_KEY = hashlib.sha1(
+    repr((_CACHE_VERSION, RAW_DTYPES, COLUMN_MAPPING, STOCK_INDEX_MAPPING, CORE_COLUMNS)).encode()
+).hexdigest()[:8]
+
+def _load_cleaned_cache(path: Path) -> pd.DataFrame:
+    """Return the cleaned frame for all indices, memoized as Parquet next to `path`."""
+    cache = path.with_name(f"{path.stem}.cleaned-{_CACHE_KEY}.parquet")
+    if cache.exists() and cache.stat().st_mtime >= path.stat().st_mtime:
+        return pd.read_parquet(cache, engine='pyarrow')
+
+    df = _clean_data(path)
+    try:
+        df.to_parquet(cache, engine='pyarrow', compression='zstd', index=True)
+    except OSError as exc:
+        print(f"Could not write cache {cache}: {exc}")
+    return df
+
+def _partition_dir(path: Path) -> Path:
+    """Directory of the per-index Parquet dataset built by `build_partitioned_dataset`."""
+    return path.with_name(f"{path.stem}_partitioned")
+
+def _partition_is_fresh(root: Path, path: Path) -> bool:
+    """True if the dataset at `root` was built from the current CSV and cleaning code."""
+    stamp = root / '_cache_key'
+    return (stamp.is_file() and stamp.stat().st_mtime >= path.stat().st_mtime
+            and stamp.read_text() == _CACHE_KEY)
+
+def build_partitioned_dataset(file_path='../data/indexData.csv') -> Path:
+    """Write the cleaned data as Parquet partitioned by stock_index.
+
+    Each `stock_index=<name>/` partition holds that index's rows already
+    sorted by date, so `load_data(stock_index=...)` reads a single partition
+    and skips the full-table scan and sort.
+    """
+    path = Path(file_path)
+    if not path.exists():
+        raise FileNotFoundError(f"The file not found: {path}")
+    if pa is None:
+        raise ImportError("pyarrow is required to build the partitioned dataset. Install with `pip install pyarrow`.")
+    root = _partition_dir(path)
+    df = _clean_data(path)
+    df.to_parquet(root, partition_cols=['stock_index'], engine='pyarrow',
+                  row_group_size=50_000, existing_data_behavior='delete_matching')
+    # Stamp the cleaning key last; its mtime and contents mark the dataset fresh
+    # (files starting with '_' are skipped when the dataset is read)
+    (root / '_cache_key').write_text(_CACHE_KEY)
+    return root
+
+def _load_partition(root: Path, name: str, start_date=None, end_date=None) -> pd.DataFrame:
+    """Read one index's partition; date bounds are pushed down to row groups."""
+    filters = [('stock_index', '==', name)]
+    if start_date:
+        filters.append(('date', '>=', pd.to_datetime(start_date)))
+    if end_date:
+        filters.append(('date', '<=', pd.to_datetime(end_date)))
+    df = pd.read_parquet(root, filters=filters, engine='pyarrow')
+    # Partition keys come back as the last column; restore the loader's layout
+    df = df[['stock_index'] + [col for col in df.columns if col != 'stock_index']]
+    return _only_index(DataCleaner().downcast(df), name)
+
+def load_data(stock_index=None, start_date=None, end_date=None, file_path='../data/indexData.csv', use_cache=True):
+    """Load data from a given file path.
+
+    With pyarrow installed the cleaned frame is cached as Parquet beside the
+    CSV and reused until the CSV changes; pass `use_cache=False` to bypass it.
+    If a partitioned dataset exists (see `scripts/partition.py`) and is newer
+    than the CSV, single-index loads read only that index's partition.
+    """
+    print(f"Loading data from {file_path}...")
+    
+    # read CSV
+    path = Path(file_path)
+    # Error handling for file not found
+    if not path.exists():
+        raise FileNotFoundError(f"The file not found: {path}")
+
+    if not use_cache or pa is None:
+        return _clean_data(path, stock_index, start_date, end_date)
+
+    root = _partition_dir(path)
+    if stock_index and _partition_is_fresh(root, path):
+        name = STOCK_INDEX_MAPPING.get(stock_index, stock_index)
+        return _load_partition(root, name, start_date, end_date)
+
+    # Only the cheap index/date filters run on the cached frame
+    df = _load_cleaned_cache(path)
+    if stock_index:
+        name = STOCK_INDEX_MAPPING.get(stock_index, stock_index)
+        df = _only_index(df[df['stock_index'] == name], name)
+    cleaner = DataCleaner()
+    df = cleaner.filter_by_dates(df, start_date, end_date)
     return df
@@ -2,107 +2,185 @@
 
 This file provides a compact FeatureEngineering class with a small set of
 well-tested methods most pipelines need: pct change, SMA/EMA, RSI, MACD,
-lags, simple temporal features and target creation. Each method returns a
-new DataFrame copy and keeps the implementation minimal and readable.
+lags, simple temporal features and target creation. Methods write their
+columns into a shared dict of arrays and `engineer()` joins it onto the
+input frame once, so no intermediate DataFrame copies are made. The price
+indicators are computed in a single compiled pass (see
+`feature_engineering_kernels`).
 
 Also includes a DataPrep class for orchestrating full data prep pipelines
 (load → filter → engineer → select features).
 """
 
-from typing import Optional
+import re
+from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
+from joblib import Parallel, delayed
 from pathlib import Path
 
+from src.feature_engineering_kernels import _emas, _fused_indicators, _rsi_wilder, _sma_pair
+
+# Row count above which `engineer()` runs its feature groups on threads;
+# below it a thread pool costs more than the whole sequential pipeline
+_PARALLEL_MIN_ROWS = 1_000_000
+
+# Engineered frames (and filtered row counts) from `DataPrep.prepare`, keyed by
+# (DataPrep class, resolved file, file mtime, pattern, lags)
+_PREPARE_CACHE: Dict[tuple, Tuple[pd.DataFrame, int]] = {}
+_PREPARE_CACHE_SIZE = 8
+
+
+def _check_close(close: np.ndarray) -> None:
+    """Reject NaN prices: the compiled recurrences carry a NaN forward forever."""
+    if np.isnan(close).any():
+        raise ValueError(
+            "close contains NaN values; drop or fill missing prices before feature "
+            "engineering (load_data() returns cleaned data)"
+        )
+
 
 class FeatureEngineering:
     """Small, focused feature engineering helper.
 
+    Feature methods take the input as NumPy arrays and mutate ``out``, a
+    dict mapping column name -> array, instead of returning a DataFrame.
+
     Params:
         short (int): short window for moving averages
         long (int): long window for moving averages
         rsi (int): period for RSI
+        n_jobs (int): threads used by `engineer()` for independent feature
+            groups on series of at least `_PARALLEL_MIN_ROWS` rows
+            (-1 = all cores, 1 = always sequential)
     """
 
-    def __init__(self, short: int = 5, long: int = 20, rsi: int = 14):
+    def __init__(self, short: int = 5, long: int = 20, rsi: int = 14, n_jobs: int = -1):
         self.short = short
         self.long = long
         self.rsi = rsi
+        self.n_jobs = n_jobs
 
-    def pct_change(self, df: pd.DataFrame, col: str = "close") -> pd.DataFrame:
-        df = df.copy()
-        df["pct_change"] = df[col].pct_change() * 100
-        return df
+    def pct_change(self, close: np.ndarray, out: Dict[str, np.ndarray]) -> None:
+        # NaN where the previous close is 0, matching `indicators()`
+        pct = np.full(close.shape[0], np.nan)
+        prev = close[:-1]
+        np.divide(close[1:], prev, out=pct[1:], where=prev != 0.0)
+        pct[1:] -= 1.0
+        pct[1:] *= 100
+        out["pct_change"] = pct
 
-    def sma(self, df: pd.DataFrame, col: str = "close") -> pd.DataFrame:
-        df = df.copy()
-        df[f"sma_{self.short}"] = df[col].rolling(self.short).mean()
-        df[f"sma_{self.long}"] = df[col].rolling(self.long).mean()
-        return df
+    def sma(self, close: np.ndarray, out: Dict[str, np.ndarray]) -> None:
+        _check_close(close)
+        sma_s, sma_l = _sma_pair(close, self.short, self.long)
+        out[f"sma_{self.short}"] = sma_s
+        out[f"sma_{self.long}"] = sma_l
 
-    def ema(self, df: pd.DataFrame, col: str = "close") -> pd.DataFrame:
-        df = df.copy()
-        df[f"ema_{self.short}"] = df[col].ewm(span=self.short, adjust=False).mean()
-        df[f"ema_{self.long}"] = df[col].ewm(span=self.long, adjust=False).mean()
-        return df
+    def ema(self, close: np.ndarray, out: Dict[str, np.ndarray]) -> None:
+        _check_close(close)
+        ema_s, ema_l = _emas(close, 2.0 / (np.array([self.short, self.long]) + 1.0))
+        out[f"ema_{self.short}"] = ema_s
+        out[f"ema_{self.long}"] = ema_l
 
-    def rsi_simple(self, df: pd.DataFrame, col: str = "close", period: Optional[int] = None) -> pd.DataFrame:
+    def rsi_simple(self, close: np.ndarray, out: Dict[str, np.ndarray], period: Optional[int] = None) -> None:
+        """Wilder's RSI (smoothed average gains/losses)."""
+        _check_close(close)
         period = period or self.rsi
-        df = df.copy()
-        delta = df[col].diff()
-        up = delta.clip(lower=0).rolling(period).mean()
-        down = -delta.clip(upper=0).rolling(period).mean()
-        rs = up / down
-        df["rsi"] = 100 - (100 / (1 + rs))
-        return df
-
-    def macd(self, df: pd.DataFrame, col: str = "close", fast: int = 12, slow: int = 26, sig: int = 9) -> pd.DataFrame:
-        df = df.copy()
-        ema_fast = df[col].ewm(span=fast, adjust=False).mean()
-        ema_slow = df[col].ewm(span=slow, adjust=False).mean()
-        df["macd"] = ema_fast - ema_slow
-        df["macd_signal"] = df["macd"].ewm(span=sig, adjust=False).mean()
-        df["macd_hist"] = df["macd"] - df["macd_signal"]
-        return df
-
-    def lag(self, df: pd.DataFrame, col: str = "pct_change", n: int = 3) -> pd.DataFrame:
-        df = df.copy()
+        out["rsi"] = _rsi_wilder(close, period)
+
+    def macd(self, close: np.ndarray, out: Dict[str, np.ndarray], fast: int = 12, slow: int = 26, sig: int = 9) -> None:
+        _check_close(close)
+        ema_fast, ema_slow = _emas(close, 2.0 / (np.array([fast, slow]) + 1.0))
+        macd = ema_fast - ema_slow
+        signal = _emas(macd, np.array([2.0 / (sig + 1.0)]))[0]
+        out["macd"] = macd
+        out["macd_signal"] = signal
+        out["macd_hist"] = macd - signal
+
+    def indicators(self, close: np.ndarray, out: Dict[str, np.ndarray], fast: int = 12, slow: int = 26, sig: int = 9) -> None:
+        """Same columns as pct_change/sma/ema/rsi_simple/macd, in one pass."""
+        _check_close(close)
+        (pct, sma_s, sma_l, ema_s, ema_l,
+         rsi, macd, macd_signal, macd_hist) = _fused_indicators(close, self.short, self.long, self.rsi, fast, slow, sig)
+        out["pct_change"] = pct
+        out[f"sma_{self.short}"] = sma_s
+        out[f"sma_{self.long}"] = sma_l
+        out[f"ema_{self.short}"] = ema_s
+        out[f"ema_{self.long}"] = ema_l
+        out["rsi"] = rsi
+        out["macd"] = macd
+        out["macd_signal"] = macd_signal
+        out["macd_hist"] = macd_hist
+
+    def lag(self, x: np.ndarray, out: Dict[str, np.ndarray], n: int = 3) -> None:
+        # One Fortran-ordered block so every lag column is a contiguous view
+        lagged = np.full((x.shape[0], n), np.nan, order="F")
         for i in range(1, n + 1):
-            df[f"lag_{i}"] = df[col].shift(i)
-        return df
-
-    def temporal(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
-        if not isinstance(df.index, pd.DatetimeIndex):
-            df.index = pd.to_datetime(df.index)
-        df["dow"] = df.index.dayofweek
-        df["month"] = df.index.month
-        return df
-
-    def add_targets(self, df: pd.DataFrame, col: str = "close", shift: int = 1) -> pd.DataFrame:
-        df = df.copy()
-        df["future_return"] = df[col].pct_change(periods=shift).shift(-shift) * 100
-        df["price_up"] = (df["future_return"] > 0).astype(float)
-        return df
+            lagged[i:, i - 1] = x[:-i]
+            out[f"lag_{i}"] = lagged[:, i - 1]
+
+    def temporal(self, index: pd.Index, out: Dict[str, np.ndarray]) -> None:
+        if not isinstance(index, pd.DatetimeIndex):
+            index = pd.to_datetime(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        # Calendar fields from integer day/month counts since the epoch
+        # (1970-01-01 was a Thursday, i.e. dow 3 with Monday=0)
+        values = index.to_numpy()
+        days = values.astype("datetime64[D]").astype(np.int64)
+        months = values.astype("datetime64[M]").astype(np.int64)
+        out["dow"] = ((days + 3) % 7).astype(np.int8)
+        out["month"] = (months % 12 + 1).astype(np.int8)
+
+    def add_targets(self, close: np.ndarray, out: Dict[str, np.ndarray], shift: int = 1) -> None:
+        n = close.shape[0]
+        future_return = np.full(n, np.nan)
+        future_return[:n - shift] = (close[shift:] / close[:n - shift] - 1.0) * 100
+        out["future_return"] = future_return
+        out["price_up"] = (future_return > 0).astype(np.int8)
 
     def engineer(self, df: pd.DataFrame, include_target: bool = True, lags: int = 3) -> pd.DataFrame:
-        """Run a compact pipeline and return a new DataFrame."""
-        df = df.copy()
-        df = self.pct_change(df)
-        df = self.sma(df)
-        df = self.ema(df)
-        df = self.rsi_simple(df)
-        df = self.macd(df)
-        df = self.lag(df, col="pct_change", n=lags)
-        df = self.temporal(df)
+        """Run a compact pipeline and return a new DataFrame.
+
+        Indicator, calendar and target groups only read `close`/the index.
+        On long series (see `_PARALLEL_MIN_ROWS`) they run concurrently on
+        threads (the numba kernels release the GIL). Each group fills its own
+        dict; they are merged in a fixed order so column order does not depend
+        on scheduling. Lags are taken from the indicators' `pct_change`.
+        Raises ValueError if `close` has missing values.
+        """
+        close = df["close"].to_numpy(dtype=np.float64, copy=False)
+        groups = [(self.indicators, (close,)), (self.temporal, (df.index,))]
         if include_target:
-            df = self.add_targets(df)
-        return df
+            groups.append((self.add_targets, (close,)))
+        if self.n_jobs == 1 or close.shape[0] < _PARALLEL_MIN_ROWS:
+            parts = [_collect(method, *args) for method, args in groups]
+        else:
+            parts = Parallel(n_jobs=self.n_jobs, prefer="threads")(
+                delayed(_collect)(method, *args) for method, args in groups
+            )
+        out = parts[0]
+        self.lag(out["pct_change"], out, n=lags)
+        for part in parts[1:]:
+            out.update(part)
+        features = pd.DataFrame(out, index=df.index)
+        return df.drop(columns=features.columns, errors="ignore").join(features)
+
+
+def _collect(method, *args) -> Dict[str, np.ndarray]:
+    """Call a FeatureEngineering method with a fresh `out` dict and return it."""
+    out: Dict[str, np.ndarray] = {}
+    method(*args, out)
+    return out
 
 
 class DataPrep:
     """Orchestrate full data prep pipeline: load → filter → engineer → select features.
     
     Encapsulates the steps needed to prepare data for training (e.g., Euronext index).
+    `prepare()` memoizes the load and engineer steps per process and class
+    (see `_PREPARE_CACHE`), so repeated calls with the same file, pattern and
+    lags are cheap; feature selection and validation always run.
     """
     
     DEFAULT_CANDIDATE_FEATURES = [
@@ -121,8 +199,15 @@ class DataPrep:
         from src.data_loader import load_data
         
         df = load_data(file_path=self.file_path)
-        mask = df['stock_index'].astype(str).str.contains(stock_index_pattern, case=False, na=False)
-        df_filtered = df[mask].copy()
+        # Match the (regex) pattern against the few distinct index names, not every row
+        index_col = df['stock_index']
+        if isinstance(index_col.dtype, pd.CategoricalDtype):
+            names = index_col.cat.categories
+        else:
+            names = index_col.dropna().unique()
+        regex = re.compile(stock_index_pattern, re.IGNORECASE)
+        matches = [name for name in names if regex.search(str(name))]
+        df_filtered = df[index_col.isin(matches)].copy()
         
         if df_filtered.empty:
             raise SystemExit(f'No rows found for pattern: {stock_index_pattern}')
@@ -172,8 +257,20 @@ class DataPrep:
     
     def prepare(self, stock_index_pattern: str, candidate_features=None, lags: int = 3):
         """Full pipeline: load → filter → engineer → select → validate."""
-        df_filtered = self.load_and_filter(stock_index_pattern)
-        self.engineer(df_filtered, lags=lags)
+        path = Path(self.file_path).resolve()
+        # mtime_ns invalidates the entry when the CSV is edited
+        key = (type(self), str(path), path.stat().st_mtime_ns, stock_index_pattern, lags)
+        cached = _PREPARE_CACHE.get(key)
+        if cached is None:
+            df_filtered = self.load_and_filter(stock_index_pattern)
+            cached = (self.engineer(df_filtered, lags=lags), len(df_filtered))
+            if len(_PREPARE_CACHE) >= _PREPARE_CACHE_SIZE:
+                _PREPARE_CACHE.pop(next(iter(_PREPARE_CACHE)))
+            _PREPARE_CACHE[key] = cached
+        else:
+            print(f'Found {cached[1]} rows for {stock_index_pattern} (cached)')
+        # Hand out a copy so callers cannot mutate the cached frame
+        self.df_eng = cached[0].copy()
         self.select_features(candidate_features)
         self.validate()
         return self.df_eng, self.features
@@ -0,0 +1,213 @@
+"""Compiled kernels backing `FeatureEngineering`.
+
+The indicators used by the feature pipeline are sequential recurrences over
+a single float64 close array, so they are computed here in one explicit loop
+instead of chaining pandas rolling/ewm calls. Kernels are compiled with numba
+when it is installed; otherwise they run as plain Python with identical
+results. They are compiled with ``nogil=True`` so `FeatureEngineering.engineer`
+can run them alongside other feature groups on threads. ``fastmath`` is left
+off because the kernels rely on NaN comparisons for warm-up periods.
+Inputs must be NaN-free: a NaN would stay in the running sums and EMA
+state for the rest of the series, so callers reject it up front.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # pragma: no cover - numba is optional
+    def njit(*args, **kwargs):
+        """Fallback no-op decorator used when numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, nogil=True)
+def _rsi_value(avg_gain, avg_loss):
+    """RSI from average gain/loss; 100 when there are no losses, NaN if flat."""
+    if avg_loss > 0.0:
+        return 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    if avg_gain > 0.0:
+        return 100.0
+    return np.nan
+
+
+@njit(cache=True, nogil=True)
+def _fused_indicators(close, short, long, rsi_period, fast, slow, sig):
+    """Compute pct change, SMA/EMA pairs, RSI and MACD in a single pass.
+
+    Args:
+        close: 1-D float64 array of close prices (no NaNs)
+        short, long: windows/spans for the SMA and EMA pairs
+        rsi_period: window for the RSI gain/loss averages
+        fast, slow, sig: spans for the MACD line and its signal
+
+    Returns:
+        (pct_change, sma_short, sma_long, ema_short, ema_long,
+         rsi, macd, macd_signal, macd_hist) as float64 arrays, matching
+        pandas' `pct_change`, `rolling(w).mean()` and `ewm(adjust=False)`;
+        RSI is Wilder's (see `_rsi_wilder`).
+    """
+    n = close.shape[0]
+    nan = np.nan
+
+    pct = np.empty(n)
+    sma_s = np.empty(n)
+    sma_l = np.empty(n)
+    ema_s = np.empty(n)
+    ema_l = np.empty(n)
+    rsi = np.empty(n)
+    macd = np.empty(n)
+    signal = np.empty(n)
+    hist = np.empty(n)
+    if n == 0:
+        return pct, sma_s, sma_l, ema_s, ema_l, rsi, macd, signal, hist
+
+    a_s = 2.0 / (short + 1.0)
+    a_l = 2.0 / (long + 1.0)
+    a_fast = 2.0 / (fast + 1.0)
+    a_slow = 2.0 / (slow + 1.0)
+    a_sig = 2.0 / (sig + 1.0)
+
+    # Seed state with the first observation (ewm adjust=False semantics)
+    x = close[0]
+    sum_s = x
+    sum_l = x
+    e_s = x
+    e_l = x
+    e_fast = x
+    e_slow = x
+    e_sig = 0.0
+    avg_gain = 0.0
+    avg_loss = 0.0
+
+    pct[0] = nan
+    sma_s[0] = x if short == 1 else nan
+    sma_l[0] = x if long == 1 else nan
+    ema_s[0] = x
+    ema_l[0] = x
+    rsi[0] = nan
+    macd[0] = 0.0
+    signal[0] = 0.0
+    hist[0] = 0.0
+
+    for i in range(1, n):
+        x = close[i]
+        prev = close[i - 1]
+
+        pct[i] = (x / prev - 1.0) * 100.0 if prev != 0.0 else nan
+
+        # Rolling means via running sums (window-subtract)
+        sum_s += x
+        if i >= short:
+            sum_s -= close[i - short]
+        sma_s[i] = sum_s / short if i >= short - 1 else nan
+        sum_l += x
+        if i >= long:
+            sum_l -= close[i - long]
+        sma_l[i] = sum_l / long if i >= long - 1 else nan
+
+        # Exponential means
+        e_s = a_s * x + (1.0 - a_s) * e_s
+        e_l = a_l * x + (1.0 - a_l) * e_l
+        ema_s[i] = e_s
+        ema_l[i] = e_l
+
+        # RSI on Wilder-smoothed gains/losses of the first difference
+        delta = x - prev
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i <= rsi_period:
+            avg_gain += gain / rsi_period
+            avg_loss += loss / rsi_period
+        else:
+            avg_gain = (avg_gain * (rsi_period - 1) + gain) / rsi_period
+            avg_loss = (avg_loss * (rsi_period - 1) + loss) / rsi_period
+        rsi[i] = _rsi_value(avg_gain, avg_loss) if i >= rsi_period else nan
+
+        # MACD line, signal and histogram
+        e_fast = a_fast * x + (1.0 - a_fast) * e_fast
+        e_slow = a_slow * x + (1.0 - a_slow) * e_slow
+        m = e_fast - e_slow
+        e_sig = a_sig * m + (1.0 - a_sig) * e_sig
+        macd[i] = m
+        signal[i] = e_sig
+        hist[i] = m - e_sig
+
+    return pct, sma_s, sma_l, ema_s, ema_l, rsi, macd, signal, hist
+
+
+@njit(cache=True, nogil=True)
+def _emas(x, alphas):
+    """Exponential means of `x` for several smoothing factors in one pass.
+
+    Row `j` of the returned (len(alphas), len(x)) array equals
+    `pd.Series(x).ewm(alpha=alphas[j], adjust=False).mean()`.
+    """
+    n = x.shape[0]
+    k = alphas.shape[0]
+    out = np.empty((k, n))
+    if n == 0:
+        return out
+    state = np.empty(k)
+    for j in range(k):
+        state[j] = x[0]
+        out[j, 0] = x[0]
+    for i in range(1, n):
+        for j in range(k):
+            state[j] = alphas[j] * x[i] + (1.0 - alphas[j]) * state[j]
+            out[j, i] = state[j]
+    return out
+
+
+@njit(cache=True, nogil=True)
+def _sma_pair(x, w1, w2):
+    """Rolling means of `x` over windows `w1` and `w2` in one pass.
+
+    Matches `pd.Series(x).rolling(w).mean()` for NaN-free input: both window
+    sums are kept as running accumulators (add newest, subtract oldest).
+    """
+    n = x.shape[0]
+    out1 = np.empty(n)
+    out2 = np.empty(n)
+    s1 = 0.0
+    s2 = 0.0
+    for i in range(n):
+        s1 += x[i]
+        s2 += x[i]
+        if i >= w1:
+            s1 -= x[i - w1]
+        if i >= w2:
+            s2 -= x[i - w2]
+        out1[i] = s1 / w1 if i >= w1 - 1 else np.nan
+        out2[i] = s2 / w2 if i >= w2 - 1 else np.nan
+    return out1, out2
+
+
+@njit(cache=True, nogil=True)
+def _rsi_wilder(close, period):
+    """Wilder's RSI of `close` in one pass.
+
+    The first average gain/loss is the simple mean of the first `period`
+    differences; afterwards `avg = (avg * (period - 1) + x) / period`.
+    The first `period` values are NaN.
+    """
+    n = close.shape[0]
+    out = np.empty(n)
+    avg_gain = 0.0
+    avg_loss = 0.0
+    if n > 0:
+        out[0] = np.nan
+    for i in range(1, n):
+        delta = close[i] - close[i - 1]
+        gain = delta if delta > 0.0 else 0.0
+        loss = -delta if delta < 0.0 else 0.0
+        if i <= period:
+            avg_gain += gain / period
+            avg_loss += loss / period
+        else:
+            avg_gain = (avg_gain * (period - 1) + gain) / period
+            avg_loss = (avg_loss * (period - 1) + loss) / period
+        out[i] = _rsi_value(avg_gain, avg_loss) if i >= period else np.nan
+    return out
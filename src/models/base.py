@@ -7,16 +7,47 @@ from pathlib import Path
 from typing import List, Optional, Tuple, Dict
 import joblib
 
+import numpy as np
 import pandas as pd
+from sklearn.base import clone
 from sklearn.pipeline import Pipeline
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix, roc_auc_score
 from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
+try:
+    from sklearn.frozen import FrozenEstimator
+except ImportError:  # pragma: no cover - scikit-learn < 1.6
+    FrozenEstimator = None
+
+# Fitted preprocessors keyed by (unfitted spec, training data) hash, shared by
+# every trainer in the process
+_PREPROCESSOR_CACHE: Dict[str, ColumnTransformer] = {}
+_PREPROCESSOR_CACHE_SIZE = 8
+
+
+def _fit_preprocessor(preprocessor: ColumnTransformer, X) -> ColumnTransformer:
+    """Fit a clone of `preprocessor` on X, reusing an identical earlier fit."""
+    key = joblib.hash((preprocessor, X))
+    fitted = _PREPROCESSOR_CACHE.get(key)
+    if fitted is None:
+        fitted = clone(preprocessor).fit(X)
+        if len(_PREPROCESSOR_CACHE) >= _PREPROCESSOR_CACHE_SIZE:
+            _PREPROCESSOR_CACHE.pop(next(iter(_PREPROCESSOR_CACHE)))
+        _PREPROCESSOR_CACHE[key] = fitted
+    return fitted
+
+
 class BaseTrainer:
     """Base trainer with small, stable API.
 
     Concrete trainers must implement `build_pipeline`.
+
+    Models are trained on plain float32 C-contiguous arrays (see
+    `prepare_data`), so the preprocessor selects columns by their position
+    in `features` rather than by name. The fitted preprocessor is shared
+    between trainers with the same preprocessing spec and training data, so
+    a model bake-off fits it once rather than once per model.
     """
 
     def __init__(self,
@@ -31,9 +62,9 @@ class BaseTrainer:
         self.categorical_features = categorical_features or []
         self.transformers = []
         if self.numeric_features:
-            self.transformers.append(("num", StandardScaler(), self.numeric_features))
+            self.transformers.append(("num", StandardScaler(), self._positions(self.numeric_features)))
         if self.categorical_features:
-            self.transformers.append(("cat", OneHotEncoder(drop='first', handle_unknown='ignore', sparse_output=False), self.categorical_features))
+            self.transformers.append(("cat", OneHotEncoder(drop='first', handle_unknown='ignore', sparse_output=False), self._positions(self.categorical_features)))
         self.preprocessor = ColumnTransformer(transformers=self.transformers, remainder='drop')
         self.target = target
         self.test_size = test_size
@@ -42,33 +73,57 @@ class BaseTrainer:
         self.pipeline: Optional[Pipeline] = None
         self.metrics: Optional[Dict] = None
 
-    def prepare_data(self, df: pd.DataFrame, ts_split) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+    def _positions(self, columns: List[str]) -> List[int]:
+        """Map column names to their positions in `features`."""
+        missing = [c for c in columns if c not in self.features]
+        if missing:
+            raise ValueError(f"Columns not in features: {missing}")
+        return [self.features.index(c) for c in columns]
+
+    def prepare_data(self, df: pd.DataFrame, ts_split) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
         """Prepare X/y and apply a time-series split instance.
 
         `ts_split` is expected to be an object with a `split(df)` method
         (for example the project's `TimeSeriesSplit`).
+
+        Returns float32 C-contiguous X arrays (columns ordered as `features`)
+        and int8 y arrays.
         """
         X = df[self.features]
-        y = df[self.target].astype(int)
+        y = df[self.target]
         X_train, X_test = ts_split.split(X)
         y_train, y_test = y.loc[X_train.index], y.loc[X_test.index]
-        return X_train, X_test, y_train, y_test
+        return (
+            np.ascontiguousarray(X_train.to_numpy(dtype=np.float32)),
+            np.ascontiguousarray(X_test.to_numpy(dtype=np.float32)),
+            y_train.to_numpy(dtype=np.int8),
+            y_test.to_numpy(dtype=np.int8),
+        )
 
     def build_pipeline(self) -> Pipeline:
         raise NotImplementedError("Concrete trainers must implement build_pipeline")
 
-    def fit(self, X_train: pd.DataFrame, y_train: pd.Series):
+    def fit(self, X_train: np.ndarray, y_train: np.ndarray):
         if self.pipeline is None:
             self.pipeline = self.build_pipeline()
+        if FrozenEstimator is not None and "preprocessor" in self.pipeline.named_steps:
+            # Frozen steps are skipped by Pipeline.fit, so a shared fit is reused as-is
+            fitted = _fit_preprocessor(self.preprocessor, X_train)
+            self.pipeline.set_params(preprocessor=FrozenEstimator(fitted))
         self.pipeline.fit(X_train, y_train)
 
-    def evaluate(self, X_test: pd.DataFrame, y_test: pd.Series) -> Dict:
-        y_pred = self.pipeline.predict(X_test)
+    def evaluate(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict:
+        # One forward pass: labels are derived from the scores used for ROC AUC
         y_proba = None
-        try:
-            y_proba = self.pipeline.predict_proba(X_test)[:, 1]
-        except Exception:
-            y_proba = None
+        if hasattr(self.pipeline, "predict_proba"):
+            proba = self.pipeline.predict_proba(X_test)
+            y_pred = self.pipeline.classes_[proba.argmax(axis=1)]
+            y_proba = proba[:, 1]
+        elif hasattr(self.pipeline, "decision_function"):
+            y_proba = self.pipeline.decision_function(X_test)
+            y_pred = self.pipeline.classes_[(y_proba > 0).astype(np.int8)]
+        else:
+            y_pred = self.pipeline.predict(X_test)
 
         metrics = {
             "accuracy": float(accuracy_score(y_test, y_pred)),
@@ -79,14 +134,32 @@ class BaseTrainer:
         self.metrics = metrics
         return metrics
 
-    def predict(self, X: pd.DataFrame):
+    def predict(self, X: np.ndarray):
         return self.pipeline.predict(X)
 
-    def save(self, path: str):
+    def get_feature_names_out(self) -> np.ndarray:
+        """Names of the preprocessed columns fed to the classifier."""
+        return self.pipeline[:-1].get_feature_names_out(self.features)
+
+    def save(self, path: str, compress=0):
+        """Persist the fitted pipeline with joblib.
+
+        Files are written uncompressed by default so `load_pipeline` can
+        memory-map their arrays; joblib ignores `mmap_mode` for compressed
+        files, so pass e.g. `compress=('lz4', 3)` only when disk size matters
+        more than load time and shared memory.
+        """
         p = Path(path)
         p.parent.mkdir(parents=True, exist_ok=True)
-        joblib.dump(self.pipeline, p)
+        joblib.dump(self.pipeline, p, compress=compress)
 
     @classmethod
-    def load_pipeline(cls, path: str):
-        return joblib.load(path)
+    def load_pipeline(cls, path: str, mmap_mode: Optional[str] = 'r'):
+        """Load a pipeline saved with `save`.
+
+        With `mmap_mode='r'` large arrays (e.g. KNN training data) are mapped
+        read-only and their pages shared between processes loading the same
+        file. Predictions are unaffected: fitted estimators never write to
+        their training arrays.
+        """
+        return joblib.load(path, mmap_mode=mmap_mode)
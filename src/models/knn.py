@@ -1,4 +1,10 @@
-"""K-Nearest Neighbors trainer using the BaseTrainer API."""
+"""K-Nearest Neighbors trainer using the BaseTrainer API.
+
+Neighbour search uses an exact Faiss L2 index when faiss is installed and
+falls back to scikit-learn's `KNeighborsClassifier` otherwise.
+"""
+import numpy as np
+from sklearn.base import BaseEstimator, ClassifierMixin
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
@@ -6,17 +12,80 @@ from sklearn.compose import ColumnTransformer
 from sklearn.preprocessing import OneHotEncoder
 from .base import BaseTrainer
 
+try:
+    import faiss
+except Exception:  # pragma: no cover - optional dep may not exist in tests
+    faiss = None
+
+
+class FaissKNNClassifier(ClassifierMixin, BaseEstimator):
+    """Uniform-vote KNN classifier backed by a Faiss `IndexFlatL2`.
+
+    Neighbours are found with Faiss' SIMD brute-force search on float32
+    data; votes match `KNeighborsClassifier(weights='uniform')`. The index
+    is serialized to a byte array when pickled so fitted pipelines can be
+    saved with joblib.
+    """
+
+    def __init__(self, n_neighbors: int = 5):
+        self.n_neighbors = n_neighbors
+
+    def fit(self, X, y):
+        if faiss is None:
+            raise ImportError("faiss is required to use FaissKNNClassifier. Install with `pip install faiss-cpu`.")
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        self.classes_, self._y = np.unique(np.asarray(y), return_inverse=True)
+        self.n_features_in_ = X.shape[1]
+        self.index_ = faiss.IndexFlatL2(X.shape[1])
+        self.index_.add(X)
+        return self
+
+    def predict_proba(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        k = min(self.n_neighbors, self.index_.ntotal)
+        _, neighbors = self.index_.search(X, k)
+        votes = self._y[neighbors]
+        proba = np.empty((X.shape[0], len(self.classes_)))
+        for c in range(len(self.classes_)):
+            proba[:, c] = (votes == c).mean(axis=1)
+        return proba
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def __getstate__(self):
+        # Copy first: on Python 3.11+ the base implementation returns the live __dict__
+        state = dict(super().__getstate__())
+        if "index_" in state:
+            state["index_"] = faiss.serialize_index(state["index_"])
+        return state
+
+    def __setstate__(self, state):
+        if "index_" in state:
+            if faiss is None:
+                raise ImportError("faiss is required to load a fitted FaissKNNClassifier. Install with `pip install faiss-cpu`.")
+            state["index_"] = faiss.deserialize_index(state["index_"])
+        super().__setstate__(state)
+
 
 class KNNTrainer(BaseTrainer):
-    """KNN trainer with a simple scaler + KNN pipeline."""
+    """KNN trainer with a simple scaler + KNN pipeline.
+
+    Set `use_faiss=False` to force scikit-learn's `KNeighborsClassifier`.
+    """
 
-    def __init__(self, features, numeric_features, categorical_features, n_neighbors: int = 5, target: str = "price_up", test_size: float = 0.2, random_state: int = 42):
+    def __init__(self, features, numeric_features, categorical_features, n_neighbors: int = 5, target: str = "price_up", test_size: float = 0.2, random_state: int = 42, use_faiss: bool = True):
         super().__init__(features=features, numeric_features=numeric_features, categorical_features=categorical_features, target=target, test_size=test_size, random_state=random_state)
         self.n_neighbors = n_neighbors
+        self.use_faiss = use_faiss
         self.transformers = []
 
     def build_pipeline(self) -> Pipeline:
+        if self.use_faiss and faiss is not None:
+            clf = FaissKNNClassifier(n_neighbors=self.n_neighbors)
+        else:
+            clf = KNeighborsClassifier(n_neighbors=self.n_neighbors)
         return Pipeline([
             ("preprocessor", self.preprocessor),
-            ("clf", KNeighborsClassifier(n_neighbors=self.n_neighbors))
+            ("clf", clf)
         ])
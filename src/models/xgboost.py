@@ -2,6 +2,7 @@
 
 Note: xgboost must be installed in the environment to use this trainer.
 """
+from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 
@@ -14,19 +15,34 @@ except Exception:  # pragma: no cover - heavy dep may not exist in tests
 
 
 class XGBTrainer(BaseTrainer):
+    """Histogram-based XGBoost trainer.
+
+    Trees are split on quantile bins, so numeric features are passed through
+    unscaled; only categoricals are one-hot encoded. Set `device='cuda'` to
+    train on a GPU.
+    """
+
     def __init__(self, features, 
                  numeric_features,
                  categorical_features,
-                 n_estimators: int = 100, max_depth: int = 6, learning_rate: float = 0.1, target: str = "price_up", test_size: float = 0.2, random_state: int = 42):
+                 n_estimators: int = 100, max_depth: int = 6, learning_rate: float = 0.1, target: str = "price_up", test_size: float = 0.2, random_state: int = 42,
+                 max_bin: int = 256, device: str = "cpu"):
         super().__init__(features=features, numeric_features=numeric_features, categorical_features=categorical_features, target=target, test_size=test_size, random_state=random_state)
         self.n_estimators = n_estimators
         self.max_depth = max_depth
         self.learning_rate = learning_rate
+        self.max_bin = max_bin
+        self.device = device
+        # Scaling is a no-op for tree splits: replace the scaler with passthrough
+        self.transformers = [(name, "passthrough" if name == "num" else trans, cols) for name, trans, cols in self.transformers]
+        self.preprocessor = ColumnTransformer(transformers=self.transformers, remainder='drop')
 
     def build_pipeline(self) -> Pipeline:
         if XGBClassifier is None:
             raise ImportError("xgboost is required to use XGBTrainer. Install with `pip install xgboost`.")
-        clf = XGBClassifier(n_estimators=self.n_estimators, max_depth=self.max_depth, learning_rate=self.learning_rate, random_state=self.random_state, eval_metric='logloss')
+        clf = XGBClassifier(n_estimators=self.n_estimators, max_depth=self.max_depth, learning_rate=self.learning_rate,
+                            tree_method='hist', max_bin=self.max_bin, device=self.device, n_jobs=-1,
+                            random_state=self.random_state, eval_metric='logloss')
         return Pipeline([
             ("preprocessor", self.preprocessor),
             ("clf", clf)
@@ -5,7 +5,8 @@ chronologically without data leakage. Perfect for stock price and financial
 time-series data where temporal order must be preserved.
 """
 
-from typing import Tuple
+from typing import Optional, Tuple
+import numpy as np
 import pandas as pd
 
 
@@ -34,29 +35,78 @@ class TimeSeriesSplit:
         if len(df) < 2:
             raise ValueError("DataFrame must have at least 2 rows for train/test split")
     
-    def split(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    def split(self, df: pd.DataFrame, validate: bool = True) -> Tuple[pd.DataFrame, pd.DataFrame]:
         """Split data chronologically into train and test sets.
         
         Args:
             df: DataFrame with DatetimeIndex, sorted by date (ascending)
+            validate: check `df` first; pass False in tight loops when the
+                      caller already guarantees a sorted, non-trivial frame
         
         Returns:
             (train_df, test_df): Train set (earlier dates), test set (later dates)
         
         Raises:
             ValueError: If DataFrame is None, empty, lacks DatetimeIndex, or too small
+                        (only when `validate` is True)
         """
-        self._validate_input(df)
+        if validate:
+            self._validate_input(df)
         
         # Calculate split point
         n = len(df)
         split_point = int(n * (1 - self.test_size))
         
-        # Chronological split: no shuffling, preserves temporal order
+        # Chronological split: no shuffling, preserves temporal order.
+        # Positional slices are views of the original frame.
         train = df.iloc[:split_point]
         test = df.iloc[split_point:]
         
         return train, test
+    
+    def split_arrays(
+        self,
+        X: np.ndarray,
+        y: Optional[np.ndarray] = None,
+        timestamps: Optional[np.ndarray] = None,
+        validate: bool = True,
+    ) -> Tuple[np.ndarray, ...]:
+        """Split arrays chronologically, returning views (no copies).
+        
+        Uses the same cutoff as `split`, for callers that already hold
+        NumPy arrays in temporal order.
+        
+        Args:
+            X: feature array, rows ordered by time (ascending)
+            y: optional target array aligned with `X`
+            timestamps: optional per-row times used to check ordering
+            validate: check lengths and, if given, that `timestamps` is sorted
+        
+        Returns:
+            (X_train, X_test) or, when `y` is given,
+            (X_train, X_test, y_train, y_test)
+        
+        Raises:
+            ValueError: If there are fewer than 2 rows, lengths differ, or
+                        `timestamps` is not sorted (only when `validate` is True)
+        """
+        n = len(X)
+        if validate:
+            if n < 2:
+                raise ValueError("X must have at least 2 rows for train/test split")
+            if y is not None and len(y) != n:
+                raise ValueError(f"y has {len(y)} rows, expected {n}")
+            if timestamps is not None:
+                timestamps = np.asarray(timestamps)
+                if len(timestamps) != n:
+                    raise ValueError(f"timestamps has {len(timestamps)} rows, expected {n}")
+                if not (timestamps[1:] >= timestamps[:-1]).all():
+                    raise ValueError("timestamps must be sorted in ascending order")
+        
+        split_point = int(n * (1 - self.test_size))
+        if y is None:
+            return X[:split_point], X[split_point:]
+        return X[:split_point], X[split_point:], y[:split_point], y[split_point:]
 
 
 __all__ = ["TimeSeriesSplit"]
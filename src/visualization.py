@@ -1,32 +1,150 @@
 # --- src/visualization.py ---
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
-import matplotlib.dates as mdates
+
+try:
+    from numba import get_num_threads, njit, prange
+except ImportError:  # pragma: no cover - numba is optional
+    njit = None
 
 # Set a consistent plotting style
 plt.style.use('ggplot')
 
-def plot_missing_heatmap(df_pivot):
+# Core feature columns, in display order
+_PRICE_COLS = pd.Index(['open', 'high', 'low', 'close', 'adj_close'])
+_CORE_COLS = _PRICE_COLS.append(pd.Index(['volume']))
+
+# Number of set bits in each byte value (np.bitwise_count needs NumPy >= 2.0)
+_POPCOUNT = np.unpackbits(np.arange(256, dtype=np.uint8)[:, None], axis=1).sum(axis=1, dtype=np.uint8)
+
+# Row count above which grouped counts use the parallel numba kernels
+_PARALLEL_MIN_ROWS = 1_000_000
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _group_sum_bool(codes, mask, n_groups, n_chunks):
+        """
+        Counts True entries of `mask` per group code (codes < 0 are skipped).
+
+        Rows are split into `n_chunks` contiguous chunks (one per thread); each
+        scatters into its own row of partial sums, which are added up at the end.
+        """
+        n = codes.shape[0]
+        chunk = (n + n_chunks - 1) // n_chunks
+        partial = np.zeros((n_chunks, n_groups), dtype=np.int64)
+        for t in prange(n_chunks):
+            for i in range(t * chunk, min(n, (t + 1) * chunk)):
+                c = codes[i]
+                if c >= 0 and mask[i]:
+                    partial[t, c] += 1
+        return partial.sum(axis=0)
+
+    @njit(parallel=True, cache=True)
+    def _group_nan_count(codes, values, n_groups, n_chunks):
+        """
+        Counts NaNs per group code and column of the 2-D array `values`
+        (codes < 0 are skipped), chunked across threads like `_group_sum_bool`.
+        """
+        n, n_cols = values.shape
+        chunk = (n + n_chunks - 1) // n_chunks
+        partial = np.zeros((n_chunks, n_groups, n_cols), dtype=np.int64)
+        for t in prange(n_chunks):
+            for i in range(t * chunk, min(n, (t + 1) * chunk)):
+                c = codes[i]
+                if c >= 0:
+                    for j in range(n_cols):
+                        if np.isnan(values[i, j]):
+                            partial[t, c, j] += 1
+        return partial.sum(axis=0)
+else:  # pragma: no cover - numba is optional
+    _group_sum_bool = None
+    _group_nan_count = None
+
+def _ensure_categorical(df, col='stock_index'):
+    """
+    Returns `df` with `col` as a categorical column, so groupbys on it work on
+    integer codes instead of hashing strings. `df` itself is not modified.
+    """
+    if isinstance(df[col].dtype, pd.CategoricalDtype):
+        return df
+    return df.assign(**{col: df[col].astype('category')})
+
+def _thin(labels, max_ticks=30):
+    """
+    Picks at most `max_ticks` evenly spaced labels for a heatmap axis.
+
+    Returns:
+    (positions, labels): cell-centred tick positions and their labels.
+    """
+    step = max(1, -(-len(labels) // max_ticks))
+    positions = np.arange(0, len(labels), step)
+    return positions + 0.5, labels[positions]
+
+def _get_axes(ax, num, figsize):
+    """
+    Returns `ax` if given, otherwise the axes of the reusable figure `num`.
+
+    The named figure is created on first use and cleared on later calls
+    instead of allocating a new Figure (and canvas) every time.
+    """
+    if ax is not None:
+        return ax
+    return plt.figure(num=num, figsize=figsize, clear=True).add_subplot()
+
+def plot_missing_heatmap(df_pivot, max_rows=1000, ax=None):
     """
     Plots a heatmap showing missing data (NaN) across multiple indices.
     
     Args:
     df_pivot (pd.DataFrame): A "wide" format DataFrame with dates as the index
                              and stock indices as columns.
+    max_rows (int):          Rows are merged in blocks so at most about this many
+                             are drawn; each block is shaded by its share of
+                             missing dates.
+    ax (plt.Axes):           Axes to draw on. If None, a reusable figure is
+                             drawn and shown.
     """
-    plt.figure(figsize=(15, 10))
-    ax = sns.heatmap(df_pivot.isna(), cbar=False, cmap='viridis')
-    plt.title('Heatmap of Missing Data per Index')
-    plt.xlabel('Stock Index')
-    plt.ylabel('Date')
+    # Build the missingness mask straight from the values (1 byte per cell)
+    values = df_pivot.to_numpy(copy=False)
+    if np.issubdtype(values.dtype, np.floating):
+        mask = np.isnan(values)
+    else:
+        mask = pd.isna(values)
+
+    # Block-reduce the dates so far fewer cells are drawn. "Any missing" would
+    # flag nearly every block because of holidays, so use the missing share.
+    # The mask is bit-packed along dates (8 per byte) and blocks span whole
+    # bytes, so each block's count is a sum of per-byte popcounts.
+    k = max(1, mask.shape[0] // max_rows)
+    if k > 1:
+        k = -(-k // 8) * 8
+        n_rows = mask.shape[0]
+        bits = np.packbits(mask, axis=0)  # zero-pads the last byte
+        starts = np.arange(0, bits.shape[0], k // 8)
+        counts = np.add.reduceat(_POPCOUNT[bits], starts, axis=0, dtype=np.int32)
+        sizes = np.full(counts.shape[0], k)
+        sizes[-1] = n_rows - k * (counts.shape[0] - 1)
+        mask = counts / sizes[:, None]
+
+    show = ax is None
+    ax = _get_axes(ax, 'missing_heatmap', (15, 10))
+    sns.heatmap(mask, cbar=False, cmap='viridis', vmin=0, vmax=1,
+                xticklabels=df_pivot.columns, yticklabels=False, ax=ax)
+    ax.set_title('Heatmap of Missing Data per Index')
+    ax.set_xlabel('Stock Index')
+    ax.set_ylabel('Date')
     
-    date_form = mdates.DateFormatter("%Y-%m-%d")  
-    ax.yaxis.set_major_formatter(date_form)  
-    plt.show()
+    # Label only a sample of dates; one label per row is unreadable
+    positions, dates = _thin(df_pivot.index[::k])
+    ax.set_yticks(positions)
+    ax.set_yticklabels(dates.strftime("%Y-%m-%d"))
+    if show:
+        plt.show()
 
-def plot_normalized_comparison(df_pivot, start_date="2000-01-01"):
+def plot_normalized_comparison(df_pivot, start_date="2000-01-01", ax=None):
     """
     Plots a "horse race" chart comparing the normalized growth of all indices
     from a specific base date.
@@ -35,32 +153,34 @@ def plot_normalized_comparison(df_pivot, start_date="2000-01-01"):
     df_pivot (pd.DataFrame): A "wide" format DataFrame with dates as the index
                              and stock indices as columns.
     start_date (str):       The start date to rebase all indices to 100.
+    ax (plt.Axes):          Axes to draw on. If None, a reusable figure is
+                            drawn and shown.
     """
-    # Filter to the start date
-    df_filtered = df_pivot.loc[start_date:].copy()
-    
-    # Fill missing values for weekends/holidays (use previous day's price)
-    df_filled = df_filtered.ffill()
-    
-    # Clean up again (some indices might not exist until after start_date)
-    df_filled.dropna(axis=1, how='all', inplace=True)
-    
-    # Normalize (Rebasing to 100)
-    # df.iloc[0] is the first trading day's price in the filtered frame
-    df_normalized = (df_filled / df_filled.iloc[0]) * 100
+    # Filter to the start date, fill weekends/holidays with the previous day's
+    # price, drop indices that don't exist until after start_date, then rebase
+    # to 100: the first row is the first trading day's price in the filtered
+    # frame, and multiplying by its reciprocal avoids a per-element division.
+    # Each step returns a new frame, so no copy() or inplace is needed.
+    df_normalized = (
+        df_pivot.loc[start_date:]
+        .ffill()
+        .dropna(axis=1, how='all')
+        .pipe(lambda d: d.mul(100.0 / d.iloc[0].astype(np.float64)))
+    )
     
-    # Plot
-    plt.figure(figsize=(15, 8))
     # Plot on a matplotlib axis to get access to more functions
-    ax = df_normalized.plot(figsize=(15, 8)) 
+    show = ax is None
+    ax = _get_axes(ax, 'normalized_comparison', (15, 8))
+    df_normalized.plot(ax=ax)
     ax.set_title(f'Normalized Stock Index Growth (Rebased to 100 at {start_date})')
     ax.set_ylabel('Normalized Price (Start = 100)')
     # Place the legend outside the plot
     ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left') 
-    plt.tight_layout()
-    plt.show()
+    if show:
+        ax.figure.tight_layout()
+        plt.show()
 
-def plot_missing_counts_by_index(df_raw_renamed):
+def plot_missing_counts_by_index(df_raw_renamed, ax=None):
     """
     Plots a heatmap showing the total count AND percentage of missing values (NaN)
     for each core feature (column) per stock index.
@@ -69,66 +189,80 @@ def plot_missing_counts_by_index(df_raw_renamed):
     df_raw_renamed (pd.DataFrame): 
         The DataFrame loaded from load_raw_data(),
         which has been renamed but not yet cleaned.
+    ax (plt.Axes):
+        Axes to draw on. If None, a reusable figure is drawn and shown.
     """
     
-    # We only care about the core feature columns
-    core_columns = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
+    # We only care about the core feature columns that exist in the DataFrame
+    cols_to_check = _CORE_COLS.intersection(df_raw_renamed.columns, sort=False)
     
-    # Ensure we only select columns that exist in the DataFrame
-    cols_to_check = [col for col in core_columns if col in df_raw_renamed.columns]
-    
-    if not cols_to_check:
+    if cols_to_check.empty:
          print("No core feature columns found to plot.")
          return
 
-    # --- THIS IS THE CORRECTED LOGIC ---
-    # Select the columns we want to check
-    df_to_check = df_raw_renamed[cols_to_check]
-    # Create a boolean (True/False) DataFrame
-    df_is_na = df_to_check.isna()
-    # Group this boolean DataFrame using the 'stock_index' column from the *original* df
-    # and then sum the True (missing) values.
-    missing_counts = df_is_na.groupby(df_raw_renamed['stock_index']).sum()
-    # --- END OF CORRECTION ---
-    
-    # Calculate the total number of rows (days) for each index
-    total_counts = df_raw_renamed.groupby('stock_index').size()
-    
-    # Calculate the percentage of missing values
-    percentage_missing = missing_counts.div(total_counts, axis=0) * 100
+    if _group_nan_count is not None and len(df_raw_renamed) >= _PARALLEL_MIN_ROWS:
+        # Large frames: count NaNs per index and column in one parallel pass
+        # over the raw values, without materialising a mask DataFrame
+        codes, uniques = pd.factorize(df_raw_renamed['stock_index'], sort=False)
+        values = np.column_stack([df_raw_renamed[col].to_numpy(dtype=np.float64, na_value=np.nan)
+                                  for col in cols_to_check])
+        index = pd.Index(uniques, name='stock_index')
+        missing_counts = pd.DataFrame(_group_nan_count(codes, values, len(uniques), get_num_threads()),
+                                      index=index, columns=cols_to_check)
+        total_counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=index)
+    else:
+        # Build a uint8 missing-value mask so the groupby takes the integer-sum path,
+        # then group it using the (categorical) 'stock_index' column from the *original* df
+        df_raw_renamed = _ensure_categorical(df_raw_renamed)
+        df_is_na = df_raw_renamed[cols_to_check].isna().astype(np.uint8)
+        grouped = df_is_na.groupby(df_raw_renamed['stock_index'], sort=False, observed=True)
+        missing_counts = grouped.sum()
+        
+        # The same groups give the total number of rows (days) for each index
+        total_counts = grouped.size()
     
-    # (Optional) Filter out rows or columns with no missing data
-    counts_filtered = missing_counts.loc[(missing_counts.sum(axis=1) > 0)]
-    counts_filtered = counts_filtered.loc[:, (counts_filtered.sum() > 0)]
+    # Calculate the percentage of missing values (both tables share the group order)
+    counts = missing_counts.to_numpy()
+    percentage_missing = counts / total_counts.to_numpy()[:, None] * 100
     
-    # Apply the same filter to the percentage DataFrame
-    perc_filtered = percentage_missing.loc[counts_filtered.index, counts_filtered.columns]
+    # (Optional) Filter out rows or columns with no missing data,
+    # applying the same row/column masks to both arrays in one step each
+    row_keep = counts.sum(axis=1) > 0
+    col_keep = counts.sum(axis=0) > 0
+    keep = np.ix_(row_keep, col_keep)
+    counts_filtered = pd.DataFrame(counts[keep],
+                                   index=missing_counts.index[row_keep],
+                                   columns=missing_counts.columns[col_keep])
+    perc_filtered = percentage_missing[keep]
 
     if counts_filtered.empty:
         print("No missing values found across any index or feature.")
         return
 
-    # Create the string labels (e.g., "5000\n(50.0%)")
-    counts_str = counts_filtered.astype(int).astype(str)
-    perc_str = perc_filtered.applymap(lambda x: f"({x:.1f}%)") # e.g., (50.0%)
+    # Create the string labels (e.g., "5000\n(50.0%)") with vectorized formatting
+    counts_str = np.char.mod('%d', counts_filtered.to_numpy())
+    perc_str = np.char.mod('(%.1f%%)', perc_filtered) # e.g., (50.0%)
     
-    # Combine the two string DataFrames
-    annot_labels = counts_str + "\n" + perc_str
+    # Combine the two string arrays
+    annot_labels = np.char.add(np.char.add(counts_str, '\n'), perc_str)
 
     # Plot the heatmap
-    plt.figure(figsize=(16, 12)) 
+    show = ax is None
+    ax = _get_axes(ax, 'missing_counts_by_index', (16, 12))
     sns.heatmap(
         counts_filtered,  # The colors are based on the *absolute counts*
         annot=annot_labels, # The labels are our new formatted strings
         fmt='',           # MUST be an empty string, since our labels are pre-formatted
-        cmap='viridis_r'
+        cmap='viridis_r',
+        ax=ax
     )
-    plt.title('Total Missing Value Count and Percentage per Index and Feature')
-    plt.xlabel('Feature Column')
-    plt.ylabel('Stock Index')
-    plt.show()
+    ax.set_title('Total Missing Value Count and Percentage per Index and Feature')
+    ax.set_xlabel('Feature Column')
+    ax.set_ylabel('Stock Index')
+    if show:
+        plt.show()
 
-def plot_zero_volume_counts_by_index(df_raw_renamed):
+def plot_zero_volume_counts_by_index(df_raw_renamed, ax=None):
     """
     Plots a horizontal bar chart showing the *percentage* and *count* of non-trading days (volume = 0) for each stock index.
     This provides a "fair" comparison across indices with different lifespans.
@@ -137,21 +271,26 @@ def plot_zero_volume_counts_by_index(df_raw_renamed):
     df_raw_renamed (pd.DataFrame): 
         The DataFrame loaded from load_raw_data(),
         which has been renamed but not yet cleaned.
+    ax (plt.Axes):
+        Axes to draw on. If None, a reusable figure is drawn and shown.
     """
     
-    # Calculate the total number of rows (lifespan) for each index
-    total_counts = df_raw_renamed.groupby('stock_index').size()
-    
-    # Filter for rows where volume is exactly 0
-    zero_volume_days = df_raw_renamed[df_raw_renamed['volume'] == 0]
-    
-    # Calculate the total count of zero-volume days each index has
-    zero_counts = zero_volume_days.groupby('stock_index').size()
+    # Integer-code each index once, then count zero-volume days and total rows
+    # (lifespan) per code with np.bincount (or the parallel kernel for very
+    # large frames); indices with no zero-volume days get a count of 0
+    codes, uniques = pd.factorize(df_raw_renamed['stock_index'], sort=False)
+    is_zero = df_raw_renamed['volume'].to_numpy() == 0
+    valid = codes >= 0
+    if _group_sum_bool is not None and len(codes) >= _PARALLEL_MIN_ROWS:
+        zero_counts = _group_sum_bool(codes, is_zero, len(uniques), get_num_threads())
+    else:
+        zero_counts = np.bincount(codes[is_zero & valid], minlength=len(uniques))
+    total_counts = np.bincount(codes[valid], minlength=len(uniques))
+    index = pd.Index(uniques, name='stock_index')
+    zero_counts = pd.Series(zero_counts, index=index)
 
     # Calculate the percentage
-    # We use .reindex(total_counts.index, fill_value=0) to ensure indices 
-    # with 0 non-trading days are included in the calculation.
-    percentage = (zero_counts.reindex(total_counts.index, fill_value=0) / total_counts) * 100
+    percentage = pd.Series(zero_counts.to_numpy() / total_counts * 100, index=index)
     
     # Sort by the percentage for a cleaner chart
     percentage = percentage.sort_values(ascending=True)
@@ -161,41 +300,42 @@ def plot_zero_volume_counts_by_index(df_raw_renamed):
         return
 
     # --- Plot the horizontal bar chart based on PERCENTAGE ---
-    plt.figure(figsize=(10, 8)) 
-    ax = percentage.plot(
-        kind='barh', # 'h' for horizontal
-        color='steelblue'
-    )
+    show = ax is None
+    ax = _get_axes(ax, 'zero_volume_counts_by_index', (10, 8))
+    # Draw the bars directly on the axes (same 0.5 bar height pandas uses)
+    y = np.arange(len(percentage))
+    bars = ax.barh(y, percentage.to_numpy(), height=0.5, color='steelblue')
+    ax.set_yticks(y, labels=percentage.index.astype(str))
+    ax.set_ylim(-0.5, len(y) - 0.5)
     
-    plt.title('Percentage of Non-Trading Days (Volume = 0) per Index')
-    plt.xlabel('Percentage of Total Days')
-    plt.ylabel('Stock Index')
+    ax.set_title('Percentage of Non-Trading Days (Volume = 0) per Index')
+    ax.set_xlabel('Percentage of Total Days')
+    ax.set_ylabel('Stock Index')
     
     # --- Create custom labels (e.g., "3.6% (500 days)") ---
-    labels = []
-    for index_name in percentage.index:
-        # Get the percentage value
-        perc_val = percentage[index_name]
-        # Get the raw count (using 0 if it doesn't exist in zero_counts)
-        count_val = zero_counts.get(index_name, 0)
-        labels.append(f" {perc_val:.2f}%  ({count_val} days)") # e.g., " 3.57% (500 days)"
+    counts = zero_counts.reindex(percentage.index).to_numpy()
+    labels = [f" {perc_val:.2f}%  ({count_val} days)" # e.g., " 3.57% (500 days)"
+              for perc_val, count_val in zip(percentage.to_numpy(), counts)]
 
     # Add the value labels on the end of the bars
-    ax.bar_label(ax.containers[0], labels=labels, padding=5)
+    ax.bar_label(bars, labels=labels, padding=5)
     
     # Adjust x-axis limits to make space for labels
-    plt.xlim(0, percentage.max() * 1.15) 
+    ax.set_xlim(0, percentage.max() * 1.15) 
     
-    plt.tight_layout()
-    plt.show()
+    if show:
+        ax.figure.tight_layout()
+        plt.show()
 
-def plot_zero_values(df):
+def plot_zero_values(df, ax=None):
     """
     Plots a bar chart showing the count of "0" values in each column
     for a single index.
     
     Args:
     df (pd.DataFrame): A "long" format DataFrame for a single index's EDA.
+    ax (plt.Axes):     Axes to draw on. If None, a reusable figure is
+                       drawn and shown.
     """
     # Calculate zero values
     zero_values = (df == 0).sum()
@@ -208,12 +348,14 @@ def plot_zero_values(df):
         return
         
     # Plot
-    plt.figure(figsize=(10, 6))
-    zero_values.plot(kind='bar')
-    plt.title('Count of Zero Values per Column')
-    plt.ylabel('Number of Zero Entries')
-    plt.xticks(rotation=45)
-    plt.show()
+    show = ax is None
+    ax = _get_axes(ax, 'zero_values', (10, 6))
+    zero_values.plot(kind='bar', ax=ax)
+    ax.set_title('Count of Zero Values per Column')
+    ax.set_ylabel('Number of Zero Entries')
+    ax.tick_params(axis='x', labelrotation=45)
+    if show:
+        plt.show()
 
 def plot_distributions(df):
     """
@@ -223,18 +365,34 @@ def plot_distributions(df):
     Args:
     df (pd.DataFrame): A "long" format DataFrame for a single index's EDA.
     """
-    core_columns = ['open', 'high', 'low', 'close', 'adj_close', 'volume']
-    
     # Filter the df to only include columns that actually exist
-    cols_to_plot = [col for col in core_columns if col in df.columns]
+    cols_to_plot = _CORE_COLS.intersection(df.columns, sort=False)
     
-    if not cols_to_plot:
+    if cols_to_plot.empty:
         print("No core columns found to plot.")
         return
 
-    df[cols_to_plot].hist(bins=50, figsize=(15, 10))
-    plt.suptitle('Histograms of Data Distribution', y=1.02)
-    plt.tight_layout()
+    # Same grid DataFrame.hist would pick: k x (k - 1) or k x k, k = ceil(sqrt(n))
+    n_plots = len(cols_to_plot)
+    k = int(np.ceil(np.sqrt(n_plots)))
+    if n_plots <= 2:
+        n_rows, n_cols = 1, n_plots
+    else:
+        n_rows, n_cols = k, (k - 1 if k * (k - 1) >= n_plots else k)
+    fig = plt.figure(num='distributions', figsize=(15, 10), clear=True)
+    axes = fig.subplots(n_rows, n_cols, squeeze=False).ravel()
+
+    # Bin each column with NumPy and draw the counts directly as bars
+    for ax, col in zip(axes, cols_to_plot):
+        values = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+        counts, edges = np.histogram(values[~np.isnan(values)], bins=50)
+        ax.bar(edges[:-1], counts, width=np.diff(edges), align='edge')
+        ax.set_title(col)
+    for ax in axes[n_plots:]:
+        ax.set_visible(False)
+
+    fig.suptitle('Histograms of Data Distribution', y=1.02)
+    fig.tight_layout()
     plt.show()
 
 def plot_boxplots(df):
@@ -246,18 +404,19 @@ def plot_boxplots(df):
     df (pd.DataFrame): A "long" format DataFrame for a single index's EDA.
     """
     # Plot price features
-    price_features = ['open', 'high', 'low', 'close', 'adj_close']
-    price_features = [col for col in price_features if col in df.columns]
+    price_features = _PRICE_COLS.intersection(df.columns, sort=False)
 
-    if price_features:
-        df[price_features].plot(kind='box', figsize=(15, 7), subplots=True, layout=(1, len(price_features)))
-        plt.suptitle('Box Plots for Price Features', y=1.02)
-        plt.tight_layout()
+    if not price_features.empty:
+        fig = plt.figure(num='price_boxplots', figsize=(15, 7), clear=True)
+        axes = fig.subplots(1, len(price_features), squeeze=False).ravel()
+        df[price_features].plot(kind='box', subplots=True, ax=axes)
+        fig.suptitle('Box Plots for Price Features', y=1.02)
+        fig.tight_layout()
         plt.show()
     
     # Plot Volume separately
     if 'volume' in df.columns:
-        plt.figure(figsize=(6, 6))
-        df[['volume']].plot(kind='box')
-        plt.title('Box Plot for Volume')
+        ax = _get_axes(None, 'volume_boxplot', (6, 6))
+        df[['volume']].plot(kind='box', ax=ax)
+        ax.set_title('Box Plot for Volume')
         plt.show()
\ No newline at end of file